@@ -4,7 +4,7 @@ from config import Config
 app = Flask(__name__)
 app.config.from_object(Config)
 
-from app import routes
+from app import routes, cli
 
 if __name__=="__main__":
     app.run()
\ No newline at end of file
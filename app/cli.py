@@ -0,0 +1,76 @@
+import click
+
+from app import app
+from app.services.fpl.cache import warm_league_caches
+from app.services.fpl.fpl import warm_fpl_charts
+from app.services.fpl.snapshot import export_snapshot, import_snapshot, SnapshotError
+
+
+@app.cli.group()
+def fpl():
+    """FPL cache and analytics commands."""
+
+
+def read_league_ids(leagues_file):
+    """One league id per line; blank lines and # comments are ignored."""
+    league_ids = []
+    for line_number, line in enumerate(leagues_file, start=1):
+        line = line.split('#')[0].strip()
+        if not line:
+            continue
+        try:
+            league_ids.append(int(line))
+        except ValueError:
+            raise click.BadParameter(f"line {line_number}: {line!r} is not a league id",
+                                     param_hint='--leagues')
+    # keep file order but drop repeated leagues
+    return list(dict.fromkeys(league_ids))
+
+
+# flask fpl warm --leagues leagues.txt
+@fpl.command()
+@click.option('--leagues', 'leagues_file', type=click.File('r'), required=True,
+              help='File with one league id per line.')
+@click.option('--fetch-workers', default=8, show_default=True,
+              help='Threads used to download league picks.')
+@click.option('--workers', default=None, type=int,
+              help='Processes used to compute analytics (defaults to the CPU count).')
+def warm(leagues_file, fetch_workers, workers):
+    """Fetch, cache and compute analytics for many leagues in one run."""
+    league_ids = read_league_ids(leagues_file)
+    click.echo(f"Warming {len(league_ids)} leagues")
+
+    h2h_league_ids = warm_league_caches(league_ids, max_workers=fetch_workers)
+    failed = warm_fpl_charts(h2h_league_ids, max_workers=workers)
+
+    click.echo(f"Analytics cached for {len(h2h_league_ids) - len(failed)} of {len(league_ids)} leagues")
+    if failed:
+        click.echo(f"Failed leagues: {', '.join(str(l) for l in failed)}", err=True)
+
+
+# flask fpl export-snapshot cache-snapshot.tar.gz
+@fpl.command('export-snapshot')
+@click.argument('snapshot_path', type=click.Path(dir_okay=False, writable=True))
+def export_snapshot_command(snapshot_path):
+    """Export the cache of a warm host to a compressed snapshot."""
+    try:
+        manifest = export_snapshot(snapshot_path)
+    except SnapshotError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Exported {len(manifest['files'])} files "
+               f"({manifest['season']} GW {manifest['latest_finished_gw']}) to {snapshot_path}")
+
+
+# flask fpl import-snapshot cache-snapshot.tar.gz
+@fpl.command('import-snapshot')
+@click.argument('snapshot_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--force', is_flag=True,
+              help='Load even if the snapshot is not for the current season and gameweek.')
+def import_snapshot_command(snapshot_path, force):
+    """Verify a snapshot and load it into the cache of a new host."""
+    try:
+        manifest = import_snapshot(snapshot_path, check_current=not force)
+    except SnapshotError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Imported {len(manifest['files'])} files "
+               f"({manifest['season']} GW {manifest['latest_finished_gw']}) from {snapshot_path}")
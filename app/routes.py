@@ -1,4 +1,4 @@
-from flask import render_template, request, redirect, url_for, flash
+from flask import render_template, request, redirect, url_for, flash, jsonify
 from app import app
 from app.forms import LeagueIDForm
 import json
@@ -9,8 +9,16 @@ from datetime import datetime
 import time
 
 from app.services.articles import fetch_articles
-from app.services.fpl.fpl import get_bench_points_summary, get_fpl_charts
-from app.services.fpl.cache import enqueue_league_cache_update, fetch_fpl_with_cache
+from app.services.fpl.fpl import get_bench_points_summary, get_fpl_charts, get_fpl_charts_cached
+from app.services.fpl.cache import enqueue_league_cache_update, fetch_fpl_with_cache, start_cache_updater
+from app.services.fpl.live import get_live_league_changes, start_live_updater
+
+# background updaters only run for the web app, not for flask cli commands
+@app.before_request
+def start_background_updaters():
+    start_cache_updater()
+    start_live_updater()
+
 
 @app.route('/')
 @app.route('/home')
@@ -78,11 +86,15 @@ def chart():
     # support for head to head leagues only.
     if league_scoring_mode == 'h':
         print("League is head to head")
-        bench_row_data, bench_col_names, \
-            current_standings_row_data, current_standings_col_names, \
-            scatter_pts_for_vs_agnst_data_dict, \
-            player_initials, \
-            xlt_row_data, xlt_col_names = get_fpl_charts(league_id)
+        try:
+            bench_row_data, bench_col_names, \
+                current_standings_row_data, current_standings_col_names, \
+                scatter_pts_for_vs_agnst_data_dict, \
+                player_initials, \
+                xlt_row_data, xlt_col_names = get_fpl_charts_cached(league_id)
+        except TimeoutError:
+            flash("Your league is still being analysed. Try again in a minute.")
+            return redirect(url_for('inputLeagueID'))
 
         return render_template(
                 template_name_or_list='chart.html',
@@ -105,4 +117,14 @@ def chart():
     
     else:
         flash('Only head-to-head leagues are currently supported. Try again with a different League ID.')
-        return redirect(url_for('inputLeagueID'))
\ No newline at end of file
+        return redirect(url_for('inputLeagueID'))
+
+
+# provisional scores during a live gameweek, polled by clients with the last version they saw
+@app.route('/live/<int:league_id>')
+def live(league_id):
+    since = request.args.get('since', 0, type=int)
+    changes = get_live_league_changes(league_id, since)
+    if changes is None:
+        return jsonify({"error": "League must be loaded as a head-to-head league before following it live."}), 404
+    return jsonify(changes)
@@ -1,4 +1,5 @@
-from threading import Thread
+from threading import Thread, Lock, get_ident
+from concurrent.futures import ThreadPoolExecutor
 import os
 import json
 import time
@@ -14,11 +15,19 @@ def ensure_cache_dir():
         os.makedirs(CACHE_DIR)
 
 
+# get classic bootstrap-static straight from the api (uncached), shared by the gw checks
+def fetch_classic_bootstrap():
+    url = "https://fantasy.premierleague.com/api/bootstrap-static/"
+    return requests.get(url).json()
+
+
+def get_latest_finished_gw(bootstrap):
+    return max([e["id"] for e in bootstrap["events"] if e["finished"]])
+
+
 # get the number of the latest finished gameweek from api
 def fetch_latest_finished_gw():
-    url = "https://fantasy.premierleague.com/api/bootstrap-static/"
-    data = requests.get(url).json()
-    return max([e["id"] for e in data["events"] if e["finished"]])
+    return get_latest_finished_gw(fetch_classic_bootstrap())
 
 
 def get_cached_latest_gw(league_id):
@@ -37,6 +46,34 @@ def set_cached_latest_gw(league_id, gw):
         json.dump({"latest_finished_gw": gw}, f)
 
 
+def get_cached_fpl_charts(league_id, gw):
+    """Read the cached analytics tables for this league (None if missing or stale)."""
+    charts_file = os.path.join(CACHE_DIR, f"analytics_{league_id}.json")
+    if os.path.exists(charts_file):
+        try:
+            with open(charts_file, "r") as f:
+                cached = json.load(f)
+        except (OSError, ValueError) as e:
+            # treat an unreadable file as a miss, it is rewritten by the next computation
+            print(f"Ignoring unreadable analytics cache for league {league_id}: {e}")
+            return None
+        if cached.get("latest_finished_gw") == gw:
+            return cached["charts"]
+    return None
+
+
+def set_cached_fpl_charts(league_id, gw, charts):
+    """Write the analytics tables for this league, tagged with the GW they were computed for."""
+    charts_file = os.path.join(CACHE_DIR, f"analytics_{league_id}.json")
+    # numpy column names etc. are converted to plain lists for json
+    charts = [c.tolist() if hasattr(c, "tolist") else c for c in charts]
+    # write then rename so concurrent /chart requests never read a half written file
+    tmp_file = f"{charts_file}.{os.getpid()}.{get_ident()}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump({"latest_finished_gw": gw, "charts": charts}, f)
+    os.replace(tmp_file, charts_file)
+
+
 # get data from api, use cache if data exists already
 def fetch_fpl_with_cache(url, cache_key, update_bootstrap=False):
     if not os.path.exists(CACHE_DIR):
@@ -104,12 +141,17 @@ def update_global_cache():
     print(f"✅ Global cache updated (latest GW = {current_latest_gw})")
 
 
-def update_league_cache(league_id):
-    print("DEBUG INSIDE UPDATE LEAGUE CACHE DEF")
-    # fetch league details
+def fetch_league_details(league_id):
     url = f"https://draft.premierleague.com/api/league/{league_id}/details"
     response = urlopen(url)
-    league_details = json.loads(response.read())
+    return json.loads(response.read())
+
+
+def update_league_cache(league_id, league_details=None):
+    print("DEBUG INSIDE UPDATE LEAGUE CACHE DEF")
+    # fetch league details (unless already fetched by warm_league_caches)
+    if league_details is None:
+        league_details = fetch_league_details(league_id)
 
     league_scoring_mode = league_details['league']['scoring']
     # only support for head to head leagues
@@ -158,6 +200,57 @@ def update_league_cache(league_id):
     print(f"✅ Cache updated for league {league_id} (latest GW = {current_latest_gw})")
 
 
+def warm_league_caches(league_ids, max_workers=8):
+    """Fetch and cache many leagues in one run. Returns the head-to-head league ids."""
+    # bootstrap and live event data are shared by every league
+    update_global_cache()
+
+    def fetch_league(league_id):
+        try:
+            return league_id, fetch_league_details(league_id)
+        except Exception as e:
+            print(f"Error fetching league {league_id}: {e}")
+            return league_id, None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        fetched_leagues = list(pool.map(fetch_league, league_ids))
+
+    h2h_league_details = {}
+    for league_id, league_details in fetched_leagues:
+        if league_details is None:
+            continue
+        if league_details['league']['scoring'] != 'h':
+            print(f"League {league_id} is not head-to-head. Skipping.")
+            continue
+        h2h_league_details[league_id] = league_details
+
+    # entries playing in several leagues only have their picks fetched once
+    entry_gws = set()
+    for league_details in h2h_league_details.values():
+        finished_gws = {m['event'] for m in league_details['matches'] if m['finished']}
+        for entry in league_details['league_entries']:
+            if entry['entry_id'] is not None:
+                entry_gws.update((entry['entry_id'], gw) for gw in finished_gws)
+
+    print(f"Caching picks for {len(entry_gws)} entry gameweeks across {len(h2h_league_details)} leagues")
+
+    def fetch_entry_gw(entry_gw):
+        entry_id, gw = entry_gw
+        try:
+            fetch_fpl_with_cache(f"https://draft.premierleague.com/api/entry/{entry_id}/event/{gw}",
+                                 cache_key=f"draft_entry_{entry_id}_gw_{gw}")
+        except Exception as e:
+            print(f"Error caching picks for entry {entry_id} GW {gw}: {e}")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(fetch_entry_gw, sorted(entry_gws)))
+
+    for league_id, league_details in h2h_league_details.items():
+        update_league_cache(league_id, league_details=league_details)
+
+    return list(h2h_league_details)
+
+
 # background updater thread
 class FPLCacheUpdater(Thread):
     def __init__(self):
@@ -201,4 +294,12 @@ ensure_cache_dir()
 
 # --- singleton instance ---
 cache_updater = FPLCacheUpdater()
-cache_updater.start()
+cache_updater_lock = Lock()
+
+
+# started on the first web request (see routes.py) so flask cli commands never run the updater
+def start_cache_updater():
+    with cache_updater_lock:
+        if cache_updater.ident is None:
+            cache_updater.start()
+
@@ -1,7 +1,12 @@
 import pandas as pd
 import numpy as np
 from collections import defaultdict
-from app.services.fpl.cache import fetch_fpl_with_cache
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from app.services.fpl.cache import fetch_fpl_with_cache, get_cached_fpl_charts, set_cached_fpl_charts
+from app.services.fpl.singleflight import SingleFlight
+
+CHARTS_WAIT_TIMEOUT = 60  # seconds a request waits on another request's analytics computation
+charts_flight = SingleFlight()
 
 def get_bench_points_summary(league_id):
 
@@ -339,3 +344,53 @@ def get_fpl_charts(league_id):
             player_initials, \
             expected_standings_row_data, expected_standings_col_names
 
+
+# latest finished gw in the cached league details, used to tell when cached analytics are stale
+def get_league_latest_finished_gw(league_id):
+    league_details_url = f"https://draft.premierleague.com/api/league/{league_id}/details"
+    league_details = fetch_fpl_with_cache(url=league_details_url, cache_key=f"draft_league_{league_id}_details")
+    finished_gws = [m['event'] for m in league_details['matches'] if m['finished']]
+    return max(finished_gws) if finished_gws else 0
+
+
+def compute_and_cache_fpl_charts(league_id, gw):
+    # another request may have cached them between our cache miss and joining the flight
+    charts = get_cached_fpl_charts(league_id, gw)
+    if charts is not None:
+        return charts
+    charts = get_fpl_charts(league_id)
+    set_cached_fpl_charts(league_id, gw, charts)
+    return charts
+
+
+# get_fpl_charts, served from the analytics cache until a new gw finishes for the league
+def get_fpl_charts_cached(league_id):
+    gw = get_league_latest_finished_gw(league_id)
+    charts = get_cached_fpl_charts(league_id, gw)
+    if charts is None:
+        # concurrent requests for the same league and gw share one computation
+        charts = charts_flight.do((str(league_id), gw), compute_and_cache_fpl_charts, league_id, gw,
+                                  timeout=CHARTS_WAIT_TIMEOUT)
+    return charts
+
+
+def refresh_fpl_charts_cache(league_id):
+    """Process pool worker: compute and cache the analytics without sending them back."""
+    get_fpl_charts_cached(league_id)
+    return league_id
+
+
+# compute analytics for many leagues in parallel and write them to the analytics cache
+def warm_fpl_charts(league_ids, max_workers=None):
+    failed = []
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(refresh_fpl_charts_cache, league_id): league_id for league_id in league_ids}
+        for future in as_completed(futures):
+            league_id = futures[future]
+            try:
+                future.result()
+                print(f"✅ Analytics cached for league {league_id}")
+            except Exception as e:
+                print(f"Error computing analytics for league {league_id}: {e}")
+                failed.append(league_id)
+    return failed
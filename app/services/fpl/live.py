@@ -0,0 +1,378 @@
+from threading import Thread, Lock
+from collections import defaultdict
+import os
+import json
+import time
+from urllib.request import urlopen
+
+from app.services.fpl.cache import CACHE_DIR, fetch_classic_bootstrap, fetch_league_details
+
+LIVE_POLL_INTERVAL = 60  # seconds between event/{gw}/live polls while a gameweek is running
+GW_CHECK_INTERVAL = 900  # seconds between checks for a gameweek starting or finishing
+MAX_LIVE_DELTAS = 100  # deltas kept per league so clients can catch up from an older version
+WATCH_EXPIRY = 600  # seconds without a client poll before a league stops being followed live
+RETRY_FAILED_AFTER = 120  # seconds before retrying a league whose live state failed to load
+
+
+# get the number of the gameweek currently in progress from api (None between gameweeks)
+def fetch_live_gw():
+    data = fetch_classic_bootstrap()
+    live_gws = [e["id"] for e in data["events"] if e["is_current"] and not e["finished"]]
+    return live_gws[0] if live_gws else None
+
+
+def fetch_live_points(gw):
+    """Fetch provisional points for every player in a live GW (never cached)."""
+    # bypass fetch_fpl_with_cache so partial points never land in classic_event_{gw}_live
+    url = f"https://fantasy.premierleague.com/api/event/{gw}/live/"
+    response = urlopen(url)
+    gw_data = json.loads(response.read())
+    return {e["id"]: e["stats"]["total_points"] for e in gw_data["elements"]}
+
+
+def fetch_live_picks(entry_id, gw):
+    """Fetch an entry's picks for a live GW (never cached, they can still change with auto subs)."""
+    url = f"https://draft.premierleague.com/api/entry/{entry_id}/event/{gw}"
+    response = urlopen(url)
+    return json.loads(response.read())
+
+
+def is_cached_h2h_league(league_id):
+    """Only leagues already loaded through /chart as head-to-head can be followed live."""
+    league_cache_file = os.path.join(CACHE_DIR, f"draft_league_{league_id}_details.json")
+    if not os.path.exists(league_cache_file):
+        return False
+    with open(league_cache_file, "r") as f:
+        return json.load(f)['league']['scoring'] == 'h'
+
+
+def diff_points(previous, current):
+    """Return {classic_id: points} for players whose points changed since the last poll."""
+    return {pid: pts for pid, pts in current.items() if previous.get(pid) != pts}
+
+
+def fetch_draft_to_classic_id_map():
+    """Build the player id map from fresh bootstrap data, so players added since the last
+    global cache refresh are included. Not cached, the season analytics keep their own copy."""
+    classic_bootstrap = fetch_classic_bootstrap()
+    draft_bootstrap = json.loads(urlopen("https://draft.premierleague.com/api/bootstrap-static").read())
+    return get_draft_to_classic_id_map(classic_bootstrap, draft_bootstrap)
+
+
+def get_draft_to_classic_id_map(classic_bootstrap, draft_bootstrap):
+    """Map draft api player ids to classic api player ids (matched on name, as in fpl.py)."""
+    classic_name_to_id = {f"{e['first_name']} {e['second_name']} {e['web_name']}": e['id']
+                          for e in classic_bootstrap['elements']}
+    return {e['id']: classic_name_to_id.get(f"{e['first_name']} {e['second_name']} {e['web_name']}")
+            for e in draft_bootstrap['elements']}
+
+
+def match_result_points(points_for, points_against):
+    if points_for > points_against:
+        return 3
+    if points_for == points_against:
+        return 1
+    return 0
+
+
+class LeagueLiveState:
+    """Provisional H2H scores, standings and GW pitch/bench points for one league in a live GW."""
+
+    def __init__(self, league_id, gw, draft_to_classic):
+        self.league_id = league_id
+        self.gw = gw
+        self.version = 0
+        self.deltas = []  # (version, delta) pairs, oldest first
+
+        # fresh from the api, the cached details can be several gameweeks old
+        league_details = fetch_league_details(league_id)
+        self.h2h = league_details['league']['scoring'] == 'h'
+
+        # picks per league entry as (classic id, on_pitch), and the reverse lookup per player
+        self.entry_picks = {}
+        self.player_owners = defaultdict(list)
+        # league entries without an entry_id are the "average" opponent in odd sized leagues
+        self.average_entries = []
+
+        unmapped = set()
+        for entry in league_details['league_entries']:
+            league_entry = entry['id']
+            if entry['entry_id'] is None:
+                self.average_entries.append(league_entry)
+                continue
+            entry_gw_data = fetch_live_picks(entry['entry_id'], gw)
+            picks = []
+            for pick in entry_gw_data['picks']:
+                classic_id = draft_to_classic.get(pick['element'])
+                if classic_id is None:
+                    unmapped.add(pick['element'])
+                    continue
+                on_pitch = pick['position'] <= 11
+                picks.append((classic_id, on_pitch))
+                self.player_owners[classic_id].append(league_entry)
+            self.entry_picks[league_entry] = picks
+
+        if unmapped:
+            print(f"League {league_id}: no classic id for draft players {sorted(unmapped)}, "
+                  f"their live points are left out")
+
+        self.entry_points = {e['id']: {"gw_points_on_pitch": 0, "gw_points_on_bench": 0}
+                             for e in league_details['league_entries']}
+
+        # this gameweek's fixtures, indexed by the league entries playing in them
+        self.matches = [{"league_entry_1": m['league_entry_1'], "league_entry_1_points": 0,
+                         "league_entry_2": m['league_entry_2'], "league_entry_2_points": 0}
+                        for m in league_details['matches'] if m['event'] == gw]
+        self.entry_matches = defaultdict(list)
+        for i, m in enumerate(self.matches):
+            self.entry_matches[m['league_entry_1']].append(i)
+            self.entry_matches[m['league_entry_2']].append(i)
+
+        # standings from the league details only cover finished gameweeks
+        self.base_standings = {s['league_entry']: s for s in league_details['standings']}
+        self.standings = {}
+        for league_entry in self.base_standings:
+            self.standings[league_entry] = self.provisional_standing(league_entry)
+        self.rank_standings()
+
+    def provisional_standing(self, league_entry):
+        base = self.base_standings[league_entry]
+        row = {"total": base['total'], "points_for": base['points_for'],
+               "points_against": base['points_against'], "rank": base['rank']}
+        for i in self.entry_matches.get(league_entry, []):
+            m = self.matches[i]
+            if m['league_entry_1'] == league_entry:
+                points_for, points_against = m['league_entry_1_points'], m['league_entry_2_points']
+            else:
+                points_for, points_against = m['league_entry_2_points'], m['league_entry_1_points']
+            row['points_for'] += points_for
+            row['points_against'] += points_against
+            row['total'] += match_result_points(points_for, points_against)
+        return row
+
+    def rank_standings(self):
+        # ties on league points are broken by fpl points scored, as in draft h2h
+        order = sorted(self.standings, key=lambda le: (self.standings[le]['total'],
+                                                       self.standings[le]['points_for']), reverse=True)
+        for position, league_entry in enumerate(order, start=1):
+            self.standings[league_entry]['rank'] = position
+
+    def apply_points(self, points, changed):
+        """Update only the entries owning a changed player; record and return the delta (or None)."""
+        affected = set()
+        for classic_id in changed:
+            affected.update(self.player_owners.get(classic_id, []))
+        if not affected:
+            return None
+
+        delta = {"entries": {}, "matches": {}, "standings": {}}
+
+        for league_entry in affected:
+            picks = self.entry_picks[league_entry]
+            new_points = {
+                "gw_points_on_pitch": sum(points.get(c, 0) for c, on_pitch in picks if on_pitch),
+                "gw_points_on_bench": sum(points.get(c, 0) for c, on_pitch in picks if not on_pitch)
+            }
+            if new_points != self.entry_points[league_entry]:
+                self.entry_points[league_entry] = new_points
+                delta['entries'][league_entry] = new_points
+
+        if not delta['entries']:
+            return None
+
+        # the average opponent scores the mean of the real entries
+        if self.average_entries:
+            pitch_points = [self.entry_points[le]['gw_points_on_pitch'] for le in self.entry_picks]
+            average = round(sum(pitch_points) / len(pitch_points)) if pitch_points else 0
+            for league_entry in self.average_entries:
+                if self.entry_points[league_entry]['gw_points_on_pitch'] != average:
+                    self.entry_points[league_entry] = {"gw_points_on_pitch": average, "gw_points_on_bench": 0}
+                    delta['entries'][league_entry] = self.entry_points[league_entry]
+
+        # provisional h2h scores for the fixtures involving changed entries
+        touched_entries = set()
+        for league_entry in delta['entries']:
+            for i in self.entry_matches.get(league_entry, []):
+                m = self.matches[i]
+                m['league_entry_1_points'] = self.entry_points[m['league_entry_1']]['gw_points_on_pitch']
+                m['league_entry_2_points'] = self.entry_points[m['league_entry_2']]['gw_points_on_pitch']
+                delta['matches'][i] = dict(m)
+                touched_entries.update([m['league_entry_1'], m['league_entry_2']])
+
+        # re-rank the table, reporting only rows that actually moved
+        previous = {le: dict(row) for le, row in self.standings.items()}
+        for league_entry in touched_entries:
+            if league_entry in self.base_standings:
+                self.standings[league_entry] = self.provisional_standing(league_entry)
+        self.rank_standings()
+        for league_entry, row in self.standings.items():
+            if row != previous[league_entry]:
+                delta['standings'][league_entry] = dict(row)
+
+        self.version += 1
+        self.deltas.append((self.version, delta))
+        if len(self.deltas) > MAX_LIVE_DELTAS:
+            self.deltas.pop(0)
+        return delta
+
+    def snapshot(self):
+        return {"entries": {le: dict(p) for le, p in self.entry_points.items()},
+                "matches": {i: dict(m) for i, m in enumerate(self.matches)},
+                "standings": {le: dict(row) for le, row in self.standings.items()}}
+
+    def changes_since(self, since):
+        """Merge the deltas after `since`, or send a full snapshot if the client is too far behind."""
+        oldest = self.deltas[0][0] if self.deltas else self.version + 1
+        if since <= 0 or since > self.version or since < oldest - 1:
+            return {"version": self.version, "full": True, "changes": self.snapshot()}
+
+        changes = {"entries": {}, "matches": {}, "standings": {}}
+        for version, delta in self.deltas:
+            if version > since:
+                for key in changes:
+                    changes[key].update(delta[key])
+        return {"version": self.version, "full": False, "changes": changes}
+
+
+# background live poller thread
+class FPLLiveUpdater(Thread):
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.lock = Lock()
+        self.watched = {}  # league_id -> time a client last polled it
+        self.failed = {}  # league_id -> time its live state last failed to load, retried after a backoff
+        self.not_h2h = set()  # league_ids whose fresh details show they aren't head-to-head
+        self.leagues = {}  # league_id -> LeagueLiveState for the live gw
+        self.live_gw = None
+        self.points = {}  # classic id -> points at the last poll
+        self.draft_to_classic = None  # player id map, rebuilt for each live gw
+        self.last_gw_check = 0
+
+    def run(self):
+        while True:
+            now = time.time()
+            if now - self.last_gw_check > GW_CHECK_INTERVAL:
+                try:
+                    self.set_live_gw(fetch_live_gw())
+                except Exception as e:
+                    print(f"Error checking for a live gameweek {e}")
+                self.last_gw_check = now
+
+            self.expire_watched(now)
+
+            # only poll the api while someone is following a league
+            if self.live_gw is not None and self.watched:
+                try:
+                    self.poll()
+                except Exception as e:
+                    print(f"Error polling live gameweek {self.live_gw}: {e}")
+
+            time.sleep(LIVE_POLL_INTERVAL)
+
+    def set_live_gw(self, gw):
+        if gw == self.live_gw:
+            return
+        print(f"Live gameweek changed from {self.live_gw} to {gw}")
+        with self.lock:
+            self.live_gw = gw
+            self.points = {}
+            self.leagues = {}
+            self.watched = {}
+            self.failed = {}
+            self.not_h2h = set()
+            self.draft_to_classic = None
+
+    def expire_watched(self, now):
+        with self.lock:
+            for league_id, last_polled in list(self.watched.items()):
+                if now - last_polled > WATCH_EXPIRY:
+                    print(f"League {league_id} no longer followed live")
+                    del self.watched[league_id]
+                    self.leagues.pop(league_id, None)
+
+    def poll(self):
+        gw = self.live_gw
+        points = fetch_live_points(gw)
+        changed = diff_points(self.points, points)
+        self.points = points
+
+        # set up leagues that started being watched since the last poll, backing off after failures
+        now = time.time()
+        with self.lock:
+            pending = [league_id for league_id in self.watched if league_id not in self.leagues
+                       and now - self.failed.get(league_id, 0) >= RETRY_FAILED_AFTER]
+        if pending and self.draft_to_classic is None:
+            try:
+                self.draft_to_classic = fetch_draft_to_classic_id_map()
+            except Exception as e:
+                print(f"Error fetching bootstrap data for live gameweek {gw}: {e}")
+                pending = []
+        for league_id in pending:
+            try:
+                state = LeagueLiveState(league_id, gw, self.draft_to_classic)
+            except Exception as e:
+                print(f"Error loading live state for league {league_id}: {e}")
+                with self.lock:
+                    self.failed[league_id] = time.time()
+                continue
+            with self.lock:
+                self.failed.pop(league_id, None)
+                if state.h2h:
+                    state.apply_points(points, points)
+                    self.leagues[league_id] = state
+                else:
+                    self.watched.pop(league_id, None)
+                    self.not_h2h.add(league_id)
+
+        if not changed:
+            return
+
+        print(f"GW {gw}: {len(changed)} player scores changed")
+        with self.lock:
+            for state in self.leagues.values():
+                state.apply_points(points, changed)
+
+    def watch(self, league_id):
+        """Follow a cached head-to-head league live. Returns False if it isn't one."""
+        now = time.time()
+        with self.lock:
+            if league_id in self.watched:
+                self.watched[league_id] = now
+                return True
+            if league_id in self.not_h2h:
+                return False
+        if not is_cached_h2h_league(league_id):
+            return False
+        with self.lock:
+            self.watched[league_id] = now
+        return True
+
+    def get_changes(self, league_id, since):
+        with self.lock:
+            state = self.leagues.get(league_id)
+            if state is None:
+                # not loaded yet (or retrying after a failed load), picked up on a later poll
+                return {"live": True, "gameweek": self.live_gw, "version": 0, "pending": True,
+                        "retrying": league_id in self.failed}
+            return {"live": True, "gameweek": self.live_gw, **state.changes_since(since)}
+
+
+# call this in routes.py when a client follows a league live (None if the league can't be followed)
+def get_live_league_changes(league_id, since=0):
+    if live_updater.live_gw is None:
+        return {"live": False}
+    if not live_updater.watch(league_id):
+        return None
+    return live_updater.get_changes(league_id, since)
+
+
+# --- singleton instance ---
+live_updater = FPLLiveUpdater()
+live_updater_lock = Lock()
+
+
+# started on the first web request (see routes.py) so flask cli commands never run the poller
+def start_live_updater():
+    with live_updater_lock:
+        if live_updater.ident is None:
+            live_updater.start()
@@ -0,0 +1,47 @@
+from threading import Lock, Event
+
+
+class _Call:
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers with the same key share its result."""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.calls = {}  # key -> in-flight _Call
+
+    def do(self, key, fn, *args, timeout=None):
+        """Call fn(*args), or wait up to `timeout` seconds for the in-flight call with this key.
+
+        Errors raised by fn, including BaseExceptions, are re-raised in every waiting caller.
+        Raises TimeoutError if a waiting caller gives up before the in-flight call finishes.
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self.calls[key] = call
+
+        if leader:
+            try:
+                call.result = fn(*args)
+            except BaseException as e:
+                # includes KeyboardInterrupt/SystemExit, so waiters never mistake an abort for a None result
+                call.error = e
+            finally:
+                # later callers start a fresh call rather than reusing this one
+                with self.lock:
+                    del self.calls[key]
+                call.done.set()
+        elif not call.done.wait(timeout):
+            raise TimeoutError(f"Timed out after {timeout}s waiting for {key}")
+
+        if call.error is not None:
+            raise call.error
+        return call.result
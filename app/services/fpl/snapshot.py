@@ -0,0 +1,147 @@
+import os
+import io
+import json
+import hashlib
+import tarfile
+from datetime import datetime, timezone
+
+from app.services.fpl.cache import (CACHE_DIR, ensure_cache_dir, get_cached_latest_global_gw,
+                                    fetch_classic_bootstrap, get_latest_finished_gw)
+
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is unreadable, corrupt or does not match the current season/GW."""
+
+
+# season label such as "2025/26", from the first deadline in a bootstrap-static response
+def get_season(bootstrap):
+    start_year = int(bootstrap["events"][0]["deadline_time"][:4])
+    return f"{start_year}/{str(start_year + 1)[-2:]}"
+
+
+# get the current season and latest finished gameweek from api
+def fetch_current_season_and_gw():
+    bootstrap = fetch_classic_bootstrap()
+    return get_season(bootstrap), get_latest_finished_gw(bootstrap)
+
+
+def add_bytes(tar, name, data):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    tar.addfile(info, io.BytesIO(data))
+
+
+def export_snapshot(snapshot_path):
+    """Write every cached json file, plus a manifest of hashes and GW markers, to a .tar.gz."""
+    bootstrap_file = os.path.join(CACHE_DIR, "classic_bootstrap.json")
+    if not os.path.exists(bootstrap_file):
+        raise SnapshotError("Cache has no classic_bootstrap.json, warm it before exporting")
+    with open(bootstrap_file, "r") as f:
+        season = get_season(json.load(f))
+
+    latest_finished_gw = get_cached_latest_global_gw()
+    if latest_finished_gw is None:
+        raise SnapshotError("Cache has no global GW marker, warm it before exporting")
+
+    # read each file once so the hash always matches the bytes archived, even while the app rewrites it
+    contents = {}
+    for name in sorted(os.listdir(CACHE_DIR)):
+        if name.endswith(".json"):
+            with open(os.path.join(CACHE_DIR, name), "rb") as f:
+                contents[name] = f.read()
+
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "season": season,
+        "latest_finished_gw": latest_finished_gw,
+        "files": {name: hashlib.sha256(data).hexdigest() for name, data in contents.items()}
+    }
+
+    # manifest first so imports can validate before reading the rest
+    with tarfile.open(snapshot_path, "w:gz") as tar:
+        add_bytes(tar, MANIFEST_NAME, json.dumps(manifest, indent=2).encode())
+        for name, data in contents.items():
+            add_bytes(tar, name, data)
+
+    return manifest
+
+
+def read_manifest(tar):
+    try:
+        manifest = json.load(tar.extractfile(MANIFEST_NAME))
+    except KeyError:
+        raise SnapshotError("Snapshot has no manifest")
+    if not isinstance(manifest, dict) or manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        version = manifest.get("format_version") if isinstance(manifest, dict) else None
+        raise SnapshotError(f"Unsupported snapshot format version {version}")
+    if not all(key in manifest for key in ("season", "latest_finished_gw", "files")) \
+            or not isinstance(manifest["files"], dict):
+        raise SnapshotError("Snapshot manifest is incomplete")
+    return manifest
+
+
+def is_cache_file_name(name):
+    """Only plain json file names may be written into the cache dir."""
+    return (name.endswith(".json") and name != MANIFEST_NAME and not name.startswith(".")
+            and "/" not in name and "\\" not in name and os.path.basename(name) == name)
+
+
+def read_verified_files(tar, manifest):
+    members = {m.name: m for m in tar.getmembers()}
+    contents = {}
+    for name, expected_hash in manifest["files"].items():
+        if not is_cache_file_name(name):
+            raise SnapshotError(f"Unsafe file name in snapshot: {name}")
+        member = members.get(name)
+        if member is None:
+            raise SnapshotError(f"Snapshot is missing {name}")
+        if not member.isfile():
+            raise SnapshotError(f"Snapshot entry {name} is not a regular file")
+        data = tar.extractfile(member).read()
+        if hashlib.sha256(data).hexdigest() != expected_hash:
+            raise SnapshotError(f"Hash mismatch for {name}")
+        contents[name] = data
+    return contents
+
+
+def read_snapshot(snapshot_path):
+    """Read a snapshot's manifest and verified files, without touching the cache."""
+    try:
+        with tarfile.open(snapshot_path, "r:gz") as tar:
+            manifest = read_manifest(tar)
+            contents = read_verified_files(tar, manifest)
+    except (tarfile.TarError, EOFError, OSError, ValueError) as e:
+        raise SnapshotError(f"Snapshot {snapshot_path} is unreadable: {e}")
+    return manifest, contents
+
+
+def check_snapshot_is_current(manifest):
+    try:
+        season, latest_gw = fetch_current_season_and_gw()
+    except Exception as e:
+        raise SnapshotError(f"Could not check the current season and GW: {e}")
+    if manifest["season"] != season or manifest["latest_finished_gw"] != latest_gw:
+        raise SnapshotError(f"Snapshot is for {manifest['season']} GW {manifest['latest_finished_gw']}, "
+                            f"current is {season} GW {latest_gw}")
+
+
+def import_snapshot(snapshot_path, check_current=True):
+    """Verify a snapshot and load it into the cache dir. Returns its manifest."""
+    # verify everything before touching the cache so a bad snapshot leaves it as it was
+    manifest, contents = read_snapshot(snapshot_path)
+    if check_current:
+        check_snapshot_is_current(manifest)
+
+    ensure_cache_dir()
+    for name, data in contents.items():
+        # write then rename so a running app never reads a half written file
+        cache_file = os.path.join(CACHE_DIR, name)
+        with open(f"{cache_file}.tmp", "wb") as f:
+            f.write(data)
+        os.replace(f"{cache_file}.tmp", cache_file)
+
+    return manifest
@@ -0,0 +1,19 @@
+import os
+import sys
+import tempfile
+import types
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+# the services don't need the flask app, and importing the `app` package builds it (which needs the
+# deployment's config.py), so register the packages without running app/__init__.py
+for name in ("app", "app.services", "app.services.fpl"):
+    if name not in sys.modules:
+        package = types.ModuleType(name)
+        package.__path__ = [os.path.join(ROOT, *name.split("."))]
+        sys.modules[name] = package
+
+
+def pytest_sessionstart(session):
+    # cache.py creates ./cache on import, keep it out of the checkout
+    os.chdir(tempfile.mkdtemp())
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.services.fpl import cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_fpl_charts_round_trip():
+    charts = [[["Team A", 10]], np.array(["Team Name", "Points"])]
+    cache.set_cached_fpl_charts(42, 7, charts)
+
+    assert cache.get_cached_fpl_charts(42, 7) == [[["Team A", 10]], ["Team Name", "Points"]]
+    # a form value and a cli value name the same file
+    assert cache.get_cached_fpl_charts("42", 7) is not None
+
+
+def test_fpl_charts_stale_gw_is_a_miss():
+    cache.set_cached_fpl_charts(42, 7, [[]])
+    assert cache.get_cached_fpl_charts(42, 8) is None
+
+
+def test_fpl_charts_unreadable_file_is_a_miss(cache_dir):
+    (cache_dir / "analytics_42.json").write_text('{"latest_finished_gw": 7, "cha')
+    assert cache.get_cached_fpl_charts(42, 7) is None
+
+
+def test_fpl_charts_write_leaves_no_temp_files(cache_dir):
+    cache.set_cached_fpl_charts(42, 7, [[]])
+    assert os.listdir(cache_dir) == ["analytics_42.json"]
+
+
+def league(entry_ids, scoring="h", finished_gws=(1, 2)):
+    return {
+        "league": {"scoring": scoring},
+        "league_entries": [{"id": i, "entry_id": e} for i, e in enumerate(entry_ids)],
+        "matches": [{"event": gw, "finished": True} for gw in finished_gws]
+                   + [{"event": 3, "finished": False}],
+    }
+
+
+def test_warm_league_caches_shares_entries_across_leagues(monkeypatch):
+    leagues = {1: league([100, 101]), 2: league([101, 102, None]), 3: league([103], scoring="c")}
+
+    def fetch_league_details(league_id):
+        if league_id == 4:
+            raise OSError("league not found")
+        return leagues[league_id]
+
+    fetched = []
+    monkeypatch.setattr(cache, "update_global_cache", lambda: None)
+    monkeypatch.setattr(cache, "fetch_league_details", fetch_league_details)
+    monkeypatch.setattr(cache, "fetch_fpl_with_cache", lambda url, cache_key: fetched.append(cache_key))
+    updated = []
+    monkeypatch.setattr(cache, "update_league_cache",
+                        lambda league_id, league_details: updated.append(league_id))
+
+    h2h_league_ids = cache.warm_league_caches([1, 2, 3, 4], max_workers=4)
+
+    assert h2h_league_ids == [1, 2]
+    assert sorted(updated) == [1, 2]
+    # entry 101 plays in both leagues but its picks are fetched once per finished gw
+    assert sorted(fetched) == sorted(f"draft_entry_{e}_gw_{gw}" for e in (100, 101, 102) for gw in (1, 2))
@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+
+from app.services.fpl import fpl
+from app.services.fpl.singleflight import SingleFlight
+
+N_REQUESTS = 20
+CHARTS = ("bench_row_data", "bench_col_names", "clt_row_data", "clt_col_names",
+          "scatter", "initials", "xlt_row_data", "xlt_col_names")
+
+
+@pytest.fixture
+def analytics(monkeypatch):
+    """Patch the analytics computation and its cache, recording every computation."""
+    cached = {}
+    calls = []
+    lock = threading.Lock()
+
+    def get_fpl_charts(league_id):
+        with lock:
+            calls.append(league_id)
+        time.sleep(0.3)  # long enough for every request to join the flight
+        return CHARTS
+
+    def set_cached_fpl_charts(league_id, gw, charts):
+        cached[(str(league_id), gw)] = list(charts)
+
+    monkeypatch.setattr(fpl, "charts_flight", SingleFlight())
+    monkeypatch.setattr(fpl, "get_fpl_charts", get_fpl_charts)
+    monkeypatch.setattr(fpl, "get_league_latest_finished_gw", lambda league_id: 7)
+    monkeypatch.setattr(fpl, "get_cached_fpl_charts", lambda league_id, gw: cached.get((str(league_id), gw)))
+    monkeypatch.setattr(fpl, "set_cached_fpl_charts", set_cached_fpl_charts)
+    return calls, cached
+
+
+def test_concurrent_renders_trigger_one_computation(analytics):
+    calls, cached = analytics
+    barrier = threading.Barrier(N_REQUESTS)
+    results = []
+    lock = threading.Lock()
+
+    def request(league_id):
+        barrier.wait()
+        charts = fpl.get_fpl_charts_cached(league_id)
+        with lock:
+            results.append(charts)
+
+    # form values are strings, cli values are ints, both must share the flight
+    threads = [threading.Thread(target=request, args=("123" if i % 2 else 123,)) for i in range(N_REQUESTS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(results) == N_REQUESTS
+    assert all(tuple(r) == CHARTS for r in results)
+    assert ("123", 7) in cached
+
+    # later renders are served from the cache
+    assert tuple(fpl.get_fpl_charts_cached(123)) == CHARTS
+    assert len(calls) == 1
+
+
+def test_flight_rechecks_cache_before_computing(analytics, monkeypatch):
+    calls, cached = analytics
+    cached[("123", 7)] = list(CHARTS)
+
+    # a request that missed the cache just before the previous leader stored its result
+    checks = []
+
+    def get_cached_fpl_charts(league_id, gw):
+        checks.append(league_id)
+        return None if len(checks) == 1 else cached.get((str(league_id), gw))
+
+    monkeypatch.setattr(fpl, "get_cached_fpl_charts", get_cached_fpl_charts)
+
+    assert tuple(fpl.get_fpl_charts_cached("123")) == CHARTS
+    assert len(checks) == 2
+    assert calls == []
+
+
+def test_computation_error_reaches_every_request(analytics, monkeypatch):
+    calls, cached = analytics
+
+    def get_fpl_charts(league_id):
+        calls.append(league_id)
+        time.sleep(0.3)
+        raise KeyError("league_entries")
+
+    monkeypatch.setattr(fpl, "get_fpl_charts", get_fpl_charts)
+    barrier = threading.Barrier(N_REQUESTS)
+    errors = []
+
+    def request():
+        barrier.wait()
+        try:
+            fpl.get_fpl_charts_cached(123)
+        except KeyError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=request) for _ in range(N_REQUESTS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(errors) == N_REQUESTS
+    assert cached == {}
@@ -0,0 +1,189 @@
+import pytest
+
+from app.services.fpl import live
+
+# league entries 1-3 are managers, 4 is the "average" opponent of an odd sized league
+LEAGUE_DETAILS = {
+    "league": {"scoring": "h"},
+    "league_entries": [
+        {"id": 1, "entry_id": 101},
+        {"id": 2, "entry_id": 102},
+        {"id": 3, "entry_id": 103},
+        {"id": 4, "entry_id": None},
+    ],
+    "matches": [
+        {"event": 4, "league_entry_1": 1, "league_entry_2": 2},
+        {"event": 5, "league_entry_1": 1, "league_entry_2": 2},
+        {"event": 5, "league_entry_1": 3, "league_entry_2": 4},
+    ],
+    "standings": [
+        {"league_entry": 1, "total": 9, "points_for": 200, "points_against": 180, "rank": 1},
+        {"league_entry": 2, "total": 6, "points_for": 190, "points_against": 190, "rank": 2},
+        {"league_entry": 3, "total": 3, "points_for": 170, "points_against": 185, "rank": 3},
+        {"league_entry": 4, "total": 0, "points_for": 160, "points_against": 200, "rank": 4},
+    ],
+}
+
+# draft element -> (position); draft ids map to classic ids + 1000
+PICKS = {
+    101: [{"element": 1, "position": 1}, {"element": 2, "position": 12}],
+    102: [{"element": 3, "position": 1}, {"element": 4, "position": 12}],
+    103: [{"element": 5, "position": 1}, {"element": 6, "position": 12}, {"element": 99, "position": 2}],
+}
+DRAFT_TO_CLASSIC = {i: 1000 + i for i in range(1, 7)}  # 99 is unmapped
+
+
+@pytest.fixture
+def state(monkeypatch):
+    monkeypatch.setattr(live, "fetch_league_details", lambda league_id: LEAGUE_DETAILS)
+    monkeypatch.setattr(live, "fetch_live_picks", lambda entry_id, gw: {"picks": PICKS[entry_id]})
+    return live.LeagueLiveState(7, 5, DRAFT_TO_CLASSIC)
+
+
+def test_diff_points():
+    assert live.diff_points({1: 2, 2: 3}, {1: 2, 2: 5, 3: 0}) == {2: 5, 3: 0}
+
+
+def test_draft_to_classic_id_map_matches_on_name():
+    classic = {"elements": [{"id": 50, "first_name": "A", "second_name": "B", "web_name": "C"}]}
+    draft = {"elements": [{"id": 5, "first_name": "A", "second_name": "B", "web_name": "C"},
+                          {"id": 6, "first_name": "New", "second_name": "Player", "web_name": "N"}]}
+    assert live.get_draft_to_classic_id_map(classic, draft) == {5: 50, 6: None}
+
+
+def test_initial_state_only_covers_this_gameweek(state):
+    assert len(state.matches) == 2
+    assert state.standings[1] == {"total": 10, "points_for": 200, "points_against": 180, "rank": 1}
+    assert 99 not in state.player_owners
+
+
+def test_apply_points_updates_affected_entries(state):
+    points = {1001: 8, 1002: 3, 1003: 2, 1004: 0, 1005: 4, 1006: 1}
+    state.apply_points(points, points)
+
+    changed = {1003: 12}
+    delta = state.apply_points({**points, **changed}, changed)
+
+    # only entry 2 owns the changed player, plus the average opponent is recomputed
+    assert delta["entries"] == {2: {"gw_points_on_pitch": 12, "gw_points_on_bench": 0},
+                                4: {"gw_points_on_pitch": 8, "gw_points_on_bench": 0}}
+    assert delta["matches"][0] == {"league_entry_1": 1, "league_entry_1_points": 8,
+                                   "league_entry_2": 2, "league_entry_2_points": 12}
+    assert state.version == 2
+
+
+def test_bench_points_are_tracked_separately(state):
+    points = {1001: 5, 1002: 7}
+    delta = state.apply_points(points, points)
+    assert delta["entries"][1] == {"gw_points_on_pitch": 5, "gw_points_on_bench": 7}
+
+
+def test_average_opponent_scores_mean_of_real_entries(state):
+    points = {1001: 10, 1003: 5, 1005: 0}
+    state.apply_points(points, points)
+    assert state.entry_points[4]["gw_points_on_pitch"] == 5
+    assert state.matches[1]["league_entry_2_points"] == 5
+    # entry 3 scored 0 against the average's 5
+    assert state.standings[3]["total"] == 3
+    assert state.standings[4]["total"] == 3
+
+
+def test_unchanged_points_record_no_delta(state):
+    points = {1001: 4}
+    state.apply_points(points, points)
+    assert state.apply_points(points, {1001: 4}) is None
+    assert state.apply_points(points, {9999: 1}) is None
+    assert state.version == 1
+
+
+def test_standings_are_reranked_with_points_for_tiebreak(state):
+    # entry 2 beats entry 1, so both finish on 9 league points (9 + 0 and 6 + 3)
+    points = {1001: 1, 1003: 20, 1005: 50}
+    delta = state.apply_points(points, points)
+    assert state.standings[1]["total"] == 9
+    assert state.standings[2]["total"] == 9
+    # 2 now leads on points_for (190 + 20 > 200 + 1)
+    assert state.standings[2]["rank"] == 1
+    assert state.standings[1]["rank"] == 2
+    assert delta["standings"][2]["rank"] == 1
+
+
+def test_changes_since_merges_deltas(state):
+    state.apply_points({1001: 1}, {1001: 1})
+    state.apply_points({1001: 1, 1003: 2}, {1003: 2})
+    state.apply_points({1001: 6, 1003: 2}, {1001: 6})
+
+    result = state.changes_since(1)
+    assert result["version"] == 3
+    assert result["full"] is False
+    # later deltas overwrite earlier ones
+    assert result["changes"]["entries"][1] == {"gw_points_on_pitch": 6, "gw_points_on_bench": 0}
+    assert 2 in result["changes"]["entries"]
+
+
+def test_changes_since_edge_versions(state):
+    state.apply_points({1001: 1}, {1001: 1})
+    state.apply_points({1001: 2}, {1001: 2})
+
+    # a new client gets everything
+    assert state.changes_since(0)["full"] is True
+    # an up to date client gets nothing
+    current = state.changes_since(2)
+    assert current["full"] is False
+    assert current["changes"] == {"entries": {}, "matches": {}, "standings": {}}
+    # a client ahead of us (e.g. from a previous gameweek) is resynced
+    assert state.changes_since(5)["full"] is True
+
+
+def test_changes_since_falls_back_to_snapshot_when_deltas_trimmed(state, monkeypatch):
+    monkeypatch.setattr(live, "MAX_LIVE_DELTAS", 2)
+    for pts in range(1, 5):
+        state.apply_points({1001: pts}, {1001: pts})
+
+    # deltas 3 and 4 are kept, so version 2 can still be caught up but version 1 can't
+    assert [v for v, _ in state.deltas] == [3, 4]
+    assert state.changes_since(2)["full"] is False
+    snapshot = state.changes_since(1)
+    assert snapshot["full"] is True
+    assert snapshot["changes"]["entries"][1]["gw_points_on_pitch"] == 4
+
+
+@pytest.fixture
+def updater(monkeypatch):
+    monkeypatch.setattr(live, "fetch_live_points", lambda gw: {1001: 3})
+    monkeypatch.setattr(live, "is_cached_h2h_league", lambda league_id: True)
+    updater = live.FPLLiveUpdater()
+    updater.live_gw = 5
+    updater.draft_to_classic = DRAFT_TO_CLASSIC
+    return updater
+
+
+def test_failed_load_is_retried_not_rejected(updater, monkeypatch):
+    def fail(league_id):
+        raise OSError("network blip")
+    monkeypatch.setattr(live, "fetch_league_details", fail)
+
+    assert updater.watch(7)
+    updater.poll()
+
+    # still followed, reported as pending rather than as an invalid league
+    assert updater.watch(7)
+    assert updater.get_changes(7, 0) == {"live": True, "gameweek": 5, "version": 0,
+                                         "pending": True, "retrying": True}
+
+    # retried once the backoff has passed
+    monkeypatch.setattr(live, "fetch_league_details", lambda league_id: LEAGUE_DETAILS)
+    monkeypatch.setattr(live, "fetch_live_picks", lambda entry_id, gw: {"picks": PICKS[entry_id]})
+    updater.failed[7] -= live.RETRY_FAILED_AFTER
+    updater.poll()
+    assert updater.get_changes(7, 0)["full"] is True
+
+
+def test_non_h2h_league_is_rejected(updater, monkeypatch):
+    monkeypatch.setattr(live, "fetch_league_details",
+                        lambda league_id: {**LEAGUE_DETAILS, "league": {"scoring": "c"}})
+    monkeypatch.setattr(live, "fetch_live_picks", lambda entry_id, gw: {"picks": PICKS[entry_id]})
+
+    assert updater.watch(7)
+    updater.poll()
+    assert not updater.watch(7)
@@ -0,0 +1,121 @@
+import threading
+import time
+
+import pytest
+
+from app.services.fpl.singleflight import SingleFlight
+
+N_REQUESTS = 20
+
+
+def run_concurrently(target, n=N_REQUESTS):
+    """Start n threads at the same moment and wait for them all to finish."""
+    barrier = threading.Barrier(n)
+
+    def worker():
+        barrier.wait()
+        target()
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def test_concurrent_requests_trigger_one_computation():
+    flight = SingleFlight()
+    calls = []
+    results = []
+    lock = threading.Lock()
+
+    def compute(league_id):
+        with lock:
+            calls.append(league_id)
+        time.sleep(0.3)  # long enough for every request to join the flight
+        return {"league_id": league_id}
+
+    def request():
+        result = flight.do(("123", 5), compute, "123", timeout=5)
+        with lock:
+            results.append(result)
+
+    run_concurrently(request)
+
+    assert len(calls) == 1
+    assert len(results) == N_REQUESTS
+    assert all(r is results[0] for r in results)
+    assert flight.calls == {}
+
+
+def test_error_is_raised_in_every_waiter():
+    flight = SingleFlight()
+    calls = []
+    errors = []
+    lock = threading.Lock()
+
+    def compute():
+        with lock:
+            calls.append(1)
+        time.sleep(0.3)
+        raise ValueError("league not found")
+
+    def request():
+        try:
+            flight.do("league", compute, timeout=5)
+        except ValueError as e:
+            with lock:
+                errors.append(e)
+
+    run_concurrently(request)
+
+    assert len(calls) == 1
+    assert len(errors) == N_REQUESTS
+    assert flight.calls == {}
+
+
+def test_waiter_times_out():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def compute():
+        started.set()
+        time.sleep(0.5)
+        return "charts"
+
+    leader = threading.Thread(target=flight.do, args=("league", compute))
+    leader.start()
+    started.wait()
+
+    with pytest.raises(TimeoutError):
+        flight.do("league", compute, timeout=0.05)
+
+    leader.join()
+    # the leader still completes and a new call runs fresh
+    assert flight.do("league", lambda: "fresh") == "fresh"
+
+
+def test_base_exception_is_raised_in_waiters_not_none():
+    flight = SingleFlight()
+    started = threading.Event()
+    outcomes = []
+
+    def compute():
+        started.set()
+        time.sleep(0.2)
+        raise KeyboardInterrupt
+
+    def leader():
+        try:
+            flight.do("league", compute)
+        except KeyboardInterrupt:
+            outcomes.append("leader interrupted")
+
+    leader_thread = threading.Thread(target=leader)
+    leader_thread.start()
+    started.wait()
+
+    with pytest.raises(KeyboardInterrupt):
+        flight.do("league", compute, timeout=5)
+    leader_thread.join()
+    assert outcomes == ["leader interrupted"]
@@ -0,0 +1,141 @@
+import io
+import json
+import os
+import tarfile
+
+import pytest
+
+from app.services.fpl import cache, snapshot
+from app.services.fpl.snapshot import SnapshotError
+
+BOOTSTRAP = {"events": [{"id": 1, "deadline_time": "2025-08-15T17:30:00Z", "finished": True},
+                        {"id": 2, "deadline_time": "2025-08-22T17:30:00Z", "finished": True},
+                        {"id": 3, "deadline_time": "2025-08-29T17:30:00Z", "finished": False}]}
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    for module in (cache, snapshot):
+        monkeypatch.setattr(module, "CACHE_DIR", str(cache_dir))
+    monkeypatch.setattr(cache, "GLOBAL_GW_FILE", str(cache_dir / "latest_finished_gw_global.json"))
+    monkeypatch.setattr(snapshot, "fetch_current_season_and_gw", lambda: ("2025/26", 2))
+    return cache_dir
+
+
+@pytest.fixture
+def warm_cache(cache_dir):
+    (cache_dir / "classic_bootstrap.json").write_text(json.dumps(BOOTSTRAP))
+    (cache_dir / "latest_finished_gw_global.json").write_text(json.dumps({"latest_finished_gw": 2}))
+    (cache_dir / "draft_entry_101_gw_1.json").write_text(json.dumps({"picks": []}))
+    return cache_dir
+
+
+def write_archive(path, files):
+    with tarfile.open(path, "w:gz") as tar:
+        for name, data in files.items():
+            snapshot.add_bytes(tar, name, data)
+
+
+def manifest_for(files, **overrides):
+    manifest = {"format_version": 1, "season": "2025/26", "latest_finished_gw": 2,
+                "files": {name: snapshot.hashlib.sha256(data).hexdigest() for name, data in files.items()}}
+    return json.dumps({**manifest, **overrides}).encode()
+
+
+def test_get_season():
+    assert snapshot.get_season(BOOTSTRAP) == "2025/26"
+
+
+def test_export_import_round_trip(warm_cache, tmp_path):
+    path = tmp_path / "snapshot.tar.gz"
+    exported = snapshot.export_snapshot(path)
+    assert exported["season"] == "2025/26"
+    assert exported["latest_finished_gw"] == 2
+
+    originals = {name: (warm_cache / name).read_bytes() for name in os.listdir(warm_cache)}
+    for name in originals:
+        (warm_cache / name).unlink()
+
+    imported = snapshot.import_snapshot(path)
+    assert imported["files"] == exported["files"]
+    assert {name: (warm_cache / name).read_bytes() for name in os.listdir(warm_cache)} == originals
+
+
+def test_export_requires_gw_marker(warm_cache, tmp_path):
+    (warm_cache / "latest_finished_gw_global.json").unlink()
+    with pytest.raises(SnapshotError, match="GW marker"):
+        snapshot.export_snapshot(tmp_path / "snapshot.tar.gz")
+
+
+@pytest.mark.parametrize("current", [("2024/25", 2), ("2025/26", 3)])
+def test_import_rejects_wrong_season_or_gw(warm_cache, tmp_path, monkeypatch, current):
+    path = tmp_path / "snapshot.tar.gz"
+    snapshot.export_snapshot(path)
+    monkeypatch.setattr(snapshot, "fetch_current_season_and_gw", lambda: current)
+
+    with pytest.raises(SnapshotError, match="current is"):
+        snapshot.import_snapshot(path)
+    # --force skips the check
+    snapshot.import_snapshot(path, check_current=False)
+
+
+def test_import_rejects_hash_mismatch(cache_dir, tmp_path):
+    files = {"classic_bootstrap.json": b"{}"}
+    manifest = manifest_for(files)
+    path = tmp_path / "snapshot.tar.gz"
+    write_archive(path, {"manifest.json": manifest, "classic_bootstrap.json": b'{"tampered": 1}'})
+
+    with pytest.raises(SnapshotError, match="Hash mismatch"):
+        snapshot.import_snapshot(path)
+    assert os.listdir(cache_dir) == []
+
+
+@pytest.mark.parametrize("contents", [b"not a snapshot", b"\x1f\x8b\x08\x00truncated"])
+def test_import_rejects_unreadable_archive(cache_dir, tmp_path, contents):
+    path = tmp_path / "snapshot.tar.gz"
+    path.write_bytes(contents)
+    with pytest.raises(SnapshotError, match="unreadable"):
+        snapshot.import_snapshot(path)
+
+
+def test_import_rejects_truncated_archive(warm_cache, tmp_path):
+    path = tmp_path / "snapshot.tar.gz"
+    snapshot.export_snapshot(path)
+    path.write_bytes(path.read_bytes()[:-40])
+    with pytest.raises(SnapshotError):
+        snapshot.import_snapshot(path)
+
+
+def test_import_rejects_bad_manifest(cache_dir, tmp_path):
+    path = tmp_path / "snapshot.tar.gz"
+    write_archive(path, {"manifest.json": b"{not json"})
+    with pytest.raises(SnapshotError, match="unreadable"):
+        snapshot.import_snapshot(path)
+
+
+@pytest.mark.parametrize("name", ["..", ".", "notes.txt", "../evil.json", "manifest.json", ".hidden.json"])
+def test_import_rejects_unsafe_names_before_writing(cache_dir, tmp_path, name):
+    files = {"classic_bootstrap.json": b"{}", name: b"{}"}
+    path = tmp_path / "snapshot.tar.gz"
+    write_archive(path, {"manifest.json": manifest_for(files), "classic_bootstrap.json": b"{}"})
+
+    with pytest.raises(SnapshotError, match="Unsafe"):
+        snapshot.import_snapshot(path)
+    assert os.listdir(cache_dir) == []
+
+
+def test_import_rejects_non_file_members(cache_dir, tmp_path):
+    files = {"classic_bootstrap.json": b"{}"}
+    path = tmp_path / "snapshot.tar.gz"
+    with tarfile.open(path, "w:gz") as tar:
+        snapshot.add_bytes(tar, "manifest.json", manifest_for(files))
+        link = tarfile.TarInfo("classic_bootstrap.json")
+        link.type = tarfile.SYMTYPE
+        link.linkname = "/etc/passwd"
+        tar.addfile(link, io.BytesIO())
+
+    with pytest.raises(SnapshotError, match="not a regular file"):
+        snapshot.import_snapshot(path)
+    assert os.listdir(cache_dir) == []